@@ -10,4 +10,5 @@
 # __credits__ = 'Oregon State University'
 
 from .dynamixel import Dynamixel
-from .dxl import Dxl
\ No newline at end of file
+from .dxl import Dxl
+from .trajectory_cache import TrajectoryCache
@@ -1,5 +1,6 @@
 from dynamixel_sdk import *                    # Uses Dynamixel SDK library   
 from dynamixel_control.dxl import Dxl
+from dynamixel_control.trajectory_cache import TrajectoryCache
 from time import sleep
 import os
 import pickle as pkl
@@ -61,6 +62,11 @@ class Dynamixel:
         # key: id_number; value: Dxl object
         self.dxls = {}
 
+        # Converted trajectories, see load_pickle
+        self.trajectory_cache = TrajectoryCache()
+        self.data = None
+        self.goal_positions = np.array([])
+
     def reboot_dynamixel(self):
         # Try reboot
         # Dynamixel LED will flicker while it reboots
@@ -375,7 +381,10 @@ class Dynamixel:
         self.portHandler.closePort()  
 
     def load_pickle(self, file_location="Open_Loop_Data", file_name="angles_N.pkl") -> int:
-        """ Open and load in the radian values (relative positions) from the pickle file. Convert them to positions from 0 to 1023 (how the Dynamixel XL-320 uses them). Updates the joint angles lists.
+        """ Open and load in the radian values (relative positions) from the pickle file. Convert them to goal positions based on the calibration and store them in self.goal_positions.
+        Converted trajectories are cached (see TrajectoryCache), so loading the same file with the same motors again skips the conversion.
+        self.data always holds the unpickled radian values, whether or not the cache was used.
+        The calibration is applied here, so call this again after changing a center position.
 
         Args:
             file_location (string): Path to folder where the pickle is saved
@@ -384,26 +393,68 @@ class Dynamixel:
                 (default is "angles_N.pkl")
 
         Returns:
-            none
+            pickle_length (int): Number of steps in the trajectory
         """
         # TODO: Add try except here for paths
         path_to = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
         # print("PATH TO", os.path.dirname(path_to)) This backs us up one directory
         file_path = os.path.join(path_to, file_location, file_name)
-      
+
+        # Read the file once so the cache key and the unpickled data always come from the same contents
         with open(file_path, 'rb') as f:
-            self.data = pkl.load(f)
+            file_contents = f.read()
 
+        key = self.trajectory_cache.make_key(file_contents, self.calibration_signature())
+        goal_positions = self.trajectory_cache.get(key, len(self.dxls))
 
-        return len(self.data)
+        self.data = pkl.loads(file_contents)
+        if goal_positions is None:
+            goal_positions = self.convert_pickle_data(self.data)
+            self.trajectory_cache.put(key, goal_positions)
 
-        for id in self.dxls.keys():
-            name = "joint_" + str(id+1)
-            self.dxls[id].joint_angles_pickle = self.convert_rad_to_pos(data[name])
+        self.goal_positions = goal_positions
+
+        return len(self.goal_positions)
+
+    def set_trajectory(self, data) -> int:
+        """ Use radian values that are already in memory as the trajectory, bypassing the cache.
+
+        Args:
+            data (list): List of dictionaries with a "joint_N" radian value for each Dynamixel
+        Returns:
+            pickle_length (int): Number of steps in the trajectory
+        """
+
+        self.data = data
+        self.goal_positions = self.convert_pickle_data(data)
+
+        return len(self.goal_positions)
+
+    def calibration_signature(self) -> tuple:
+        """ Returns the motor settings that the converted goal positions depend on. Used as part of the trajectory cache key.
 
-        pickle_length = len(self.dxls[id].joint_angles_pickle)
+        Args:
+            none
+        Returns:
+            signature (tuple): (ID, type, center position) for each Dynamixel, in the order they were added
+        """
 
-        return pickle_length
+        return tuple((id, self.dxls[id].type, repr(self.dxls[id].center_pos)) for id in self.dxls.keys())
+
+    def convert_pickle_data(self, data) -> np.ndarray:
+        """ Convert every step of the pickled radian values to absolute goal positions based on the calibration.
+
+        Args:
+            data (list): List of dictionaries with a "joint_N" radian value for each Dynamixel
+        Returns:
+            goal_positions (np.ndarray): Goal positions with shape (steps, number of Dynamixels)
+        """
+
+        joint_names = ["joint_" + str(id_counter) for id_counter in range(1, len(self.dxls) + 1)]
+        rad = np.array([[step[name] for name in joint_names] for step in data], dtype=float).reshape(len(data), len(joint_names))
+        center_pos = np.array([self.dxls[id].center_pos for id in self.dxls.keys()])
+
+        return center_pos + self.convert_rad_to_pos(rad)
 
     def convert_rad_to_pos(self, rad: float) -> int:
         """ Converts from radians to positions from 0 to 1023.
@@ -448,20 +499,17 @@ class Dynamixel:
         return rad
 
     def map_pickle(self, i: int):
-        """ Convert from relative to absolute positions based on the calibration. Updates global goal position variable.
+        """ Updates the goal position of each Dynamixel to step i of the trajectory. Positions are converted in load_pickle, so calibration changes made after loading are not applied here.
 
         Args:
-            i (int): Index of the list to convert
+            i (int): Index of the step to use
         Returns:
             none
         """
 
-        id_counter = 1
         # Set the positions in terms of actual calibrated motor positions
-        for id in self.dxls.keys():
-        
-            self.dxls[id].goal_position = self.dxls[id].center_pos + self.convert_rad_to_pos(self.data[i]["joint_" + str(id_counter)])
-            id_counter += 1
+        for j, id in enumerate(self.dxls.keys()):
+            self.dxls[id].goal_position = self.goal_positions[i, j]
 
 
 
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+import numpy as np
+
+# Bump this whenever the radian to goal position conversion changes so old cache files are ignored
+CACHE_VERSION = 1
+
+
+class TrajectoryCache:
+    """
+    Stores the converted goal positions (ticks) of pickled trajectories so they only have to be
+    converted once.
+
+    Entries are keyed by a hash of the pickle file contents plus a signature of the attached motors
+    (ID, type and calibrated center position). Changing either the file or the calibration produces
+    a new key, so stale entries are never used. Recently used trajectories are kept in memory (LRU),
+    everything else is saved as .npy files in cache_dir.
+
+    Files in cache_dir are never deleted automatically. The default folder is
+    $XDG_CACHE_HOME/dynamixel_control (~/.cache/dynamixel_control if not set) and can be removed by hand at any time.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_entries: int = 128):
+        if cache_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            cache_dir = os.path.join(cache_home, "dynamixel_control")
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+
+        # key: cache key; value: goal position array (steps x motors)
+        self.memory = OrderedDict()
+
+    def make_key(self, file_contents: bytes, signature) -> str:
+        """ Hashes the pickle file contents together with the calibration signature into a single cache key.
+
+        Args:
+            file_contents (bytes): Raw contents of the pickle file
+            signature (tuple): Calibration/model signature of the attached motors
+        Returns:
+            key (string): Hex digest used as the cache key and file name
+        """
+        file_hash = hashlib.sha256(file_contents).hexdigest()
+        key_source = repr((CACHE_VERSION, file_hash, signature)).encode()
+
+        return hashlib.sha256(key_source).hexdigest()
+
+    def get(self, key: str, num_motors: int = None):
+        """ Looks up converted goal positions, first in memory then on disk.
+
+        Args:
+            key (string): Cache key from make_key
+            num_motors (int): Expected number of columns, files with a different shape are treated as a miss
+                (default is None, any number of columns)
+        Returns:
+            goal_positions (np.ndarray or None): Cached goal positions, None if not cached
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        cache_path = os.path.join(self.cache_dir, key + ".npy")
+        if not os.path.exists(cache_path):
+            return None
+
+        try:
+            goal_positions = np.load(cache_path, allow_pickle=False)
+        except (OSError, ValueError, EOFError):
+            # Unreadable (e.g. empty or partially written) cache file
+            goal_positions = None
+
+        if goal_positions is None or goal_positions.ndim != 2 or (num_motors is not None and goal_positions.shape[1] != num_motors):
+            # Remove the bad file so it is rewritten on the next put
+            print("Ignoring invalid trajectory cache file: %s" % cache_path)
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+            return None
+
+        self._remember(key, goal_positions)
+
+        return goal_positions
+
+    def put(self, key: str, goal_positions: np.ndarray):
+        """ Stores converted goal positions in memory and on disk.
+
+        Args:
+            key (string): Cache key from make_key
+            goal_positions (np.ndarray): Goal positions (steps x motors)
+        Returns:
+            none
+        """
+        self._remember(key, goal_positions)
+
+        # Write to a temporary file then rename so readers never see a partial file
+        temp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = os.path.join(self.cache_dir, key + ".npy")
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                temp_path = f.name
+                np.save(f, goal_positions, allow_pickle=False)
+                # Make sure the data is on disk before the rename, otherwise a crash can leave an empty file
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            # The in-memory copy still works, we just lose persistence
+            print("Failed to write trajectory cache: %s" % e)
+            if temp_path is not None and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        """ Empties the in-memory cache. Files in cache_dir are left alone.
+
+        Args:
+            none
+        Returns:
+            none
+        """
+        self.memory.clear()
+
+    def _remember(self, key: str, goal_positions: np.ndarray):
+        # Cached arrays are shared between callers, so make sure nobody modifies them
+        goal_positions.setflags(write=False)
+        self.memory[key] = goal_positions
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
@@ -0,0 +1,25 @@
+import sys
+import types
+
+# The Dynamixel SDK needs real hardware, so replace it with a stub that only covers what Dynamixel.__init__ uses
+try:
+    import dynamixel_sdk
+except ImportError:
+    dynamixel_sdk = None
+
+if dynamixel_sdk is None or not hasattr(dynamixel_sdk, "PortHandler"):
+    class _Handler:
+        def __init__(self, *args):
+            pass
+
+        def openPort(self):
+            return True
+
+        def setBaudRate(self, baudrate):
+            return True
+
+    stub = types.ModuleType("dynamixel_sdk")
+    stub.COMM_SUCCESS = 0
+    stub.PortHandler = stub.PacketHandler = stub.GroupBulkWrite = stub.GroupBulkRead = _Handler
+    stub.__all__ = ["COMM_SUCCESS", "PortHandler", "PacketHandler", "GroupBulkWrite", "GroupBulkRead"]
+    sys.modules["dynamixel_sdk"] = stub
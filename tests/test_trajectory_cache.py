@@ -0,0 +1,156 @@
+import os
+import pickle as pkl
+import numpy as np
+import pytest
+
+from dynamixel_control import Dynamixel, TrajectoryCache
+
+
+def make_data(seed, steps=50, joints=4):
+    rng = np.random.default_rng(seed)
+    return [{"joint_" + str(k): float(rng.uniform(-1, 1)) for k in range(1, joints + 1)} for _ in range(steps)]
+
+
+def write_pickle(path, data):
+    with open(path, 'wb') as f:
+        pkl.dump(data, f)
+
+
+@pytest.fixture
+def dc(tmp_path):
+    dc = Dynamixel()
+    dc.trajectory_cache = TrajectoryCache(cache_dir=str(tmp_path / "cache"))
+    for id in range(4):
+        dc.add_dynamixel(type="XL-330", ID_number=id, calibration=[1023, 2048 + id, 3073])
+    return dc
+
+
+def old_goals(dc, data):
+    # Per-step conversion used by map_pickle before the cache existed
+    return [[dc.dxls[id].center_pos + dc.convert_rad_to_pos(step["joint_" + str(j + 1)]) for j, id in enumerate(dc.dxls.keys())] for step in data]
+
+
+def replay_goals(dc, length):
+    goals = []
+    for i in range(length):
+        dc.map_pickle(i)
+        goals.append([dc.dxls[id].goal_position for id in dc.dxls.keys()])
+    return goals
+
+
+def test_fresh_and_cached_match_per_step_conversion(dc, tmp_path):
+    data = make_data(0)
+    write_pickle(tmp_path / "t.pkl", data)
+
+    length = dc.load_pickle(str(tmp_path), "t.pkl")
+    assert length == len(data)
+    assert dc.data == data
+    assert replay_goals(dc, length) == old_goals(dc, data)
+
+    # Memory hit
+    assert dc.load_pickle(str(tmp_path), "t.pkl") == length
+    assert dc.data == data
+    assert replay_goals(dc, length) == old_goals(dc, data)
+
+    # Disk hit
+    dc.trajectory_cache.clear()
+    dc.load_pickle(str(tmp_path), "t.pkl")
+    assert dc.data == data
+    assert replay_goals(dc, length) == old_goals(dc, data)
+
+
+def test_changed_contents_with_same_metadata_misses(dc, tmp_path):
+    path = tmp_path / "t.pkl"
+    write_pickle(path, make_data(0))
+    dc.load_pickle(str(tmp_path), "t.pkl")
+
+    # Same number of steps pickles to the same size, keep the old mtime too
+    stat = path.stat()
+    new_data = make_data(1)
+    write_pickle(path, new_data)
+    assert path.stat().st_size == stat.st_size
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    dc.load_pickle(str(tmp_path), "t.pkl")
+    assert dc.data == new_data
+    assert replay_goals(dc, len(new_data)) == old_goals(dc, new_data)
+
+
+def test_changed_center_pos_misses(dc, tmp_path):
+    data = make_data(0)
+    write_pickle(tmp_path / "t.pkl", data)
+    dc.load_pickle(str(tmp_path), "t.pkl")
+
+    dc.dxls[0].center_pos = 1900
+    dc.load_pickle(str(tmp_path), "t.pkl")
+    assert dc.data == data
+    assert replay_goals(dc, len(data)) == old_goals(dc, data)
+
+
+def test_memory_lru_evicts_oldest(tmp_path):
+    cache = TrajectoryCache(cache_dir=str(tmp_path), max_memory_entries=2)
+    for name in ["a", "b", "c"]:
+        cache.put(name, np.zeros((1, 1), dtype=int))
+    assert list(cache.memory.keys()) == ["b", "c"]
+
+    # Using an entry makes it the most recent
+    cache.get("b")
+    cache.put("d", np.zeros((1, 1), dtype=int))
+    assert list(cache.memory.keys()) == ["b", "d"]
+
+    # Evicted entries are still on disk
+    assert cache.get("a") is not None
+
+
+def test_truncated_file_is_a_miss(tmp_path):
+    cache = TrajectoryCache(cache_dir=str(tmp_path))
+    cache.put("key", np.arange(100).reshape(25, 4))
+    cache.clear()
+
+    cache_path = tmp_path / "key.npy"
+    contents = cache_path.read_bytes()
+    cache_path.write_bytes(contents[:len(contents) // 2])
+
+    assert cache.get("key") is None
+    assert not cache_path.exists()
+
+
+def test_empty_file_is_a_miss(tmp_path):
+    cache_path = tmp_path / "key.npy"
+    cache_path.write_bytes(b"")
+
+    assert TrajectoryCache(cache_dir=str(tmp_path)).get("key") is None
+    assert not cache_path.exists()
+
+
+def test_wrong_shape_is_a_miss(tmp_path):
+    np.save(tmp_path / "flat.npy", np.arange(8))
+    np.save(tmp_path / "columns.npy", np.zeros((5, 3), dtype=int))
+    cache = TrajectoryCache(cache_dir=str(tmp_path))
+
+    assert cache.get("flat", 4) is None
+    assert cache.get("columns", 4) is None
+    assert not (tmp_path / "flat.npy").exists()
+
+
+def test_fractional_center_pos_misses(dc, tmp_path):
+    data = make_data(0)
+    write_pickle(tmp_path / "t.pkl", data)
+
+    dc.dxls[0].center_pos = 2048.2
+    dc.load_pickle(str(tmp_path), "t.pkl")
+    dc.dxls[0].center_pos = 2048.7
+    dc.load_pickle(str(tmp_path), "t.pkl")
+    assert replay_goals(dc, len(data)) == old_goals(dc, data)
+
+
+def test_failed_write_removes_temp_file(tmp_path, monkeypatch):
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", fail_replace)
+
+    cache = TrajectoryCache(cache_dir=str(tmp_path))
+    cache.put("key", np.zeros((1, 1), dtype=int))
+
+    assert os.listdir(tmp_path) == []
+    assert cache.get("key") is not None